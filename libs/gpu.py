@@ -0,0 +1,18 @@
+#  Copyright (c) 2025.  Departamento de Ingenieria de Sistemas y Computacion
+import functools
+
+
+@functools.lru_cache(maxsize=1)
+def gpu_available() -> bool:
+    """
+    True when CuPy is installed and there is a CUDA device, CuPy is optional
+    and only imported here. The devices are queried once per process.
+    """
+    try:
+        import cupy as cp
+    except ImportError:
+        return False
+    try:
+        return cp.cuda.runtime.getDeviceCount() > 0
+    except cp.cuda.runtime.CUDARuntimeError:
+        return False
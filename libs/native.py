@@ -0,0 +1,10 @@
+#  Copyright (c) 2025.  Departamento de Ingenieria de Sistemas y Computacion
+import sys
+
+# Compiler used by tl2cgen and suffix of a shared library on this platform
+if sys.platform in ("win32", "cygwin"):
+    TOOLCHAIN, LIBRARY_SUFFIX = "msvc", ".dll"
+elif sys.platform == "darwin":
+    TOOLCHAIN, LIBRARY_SUFFIX = "gcc", ".dylib"
+else:
+    TOOLCHAIN, LIBRARY_SUFFIX = "gcc", ".so"
@@ -1,82 +1,167 @@
 #  Copyright (c) 2025.  Departamento de Ingenieria de Sistemas y Computacion
+from __future__ import annotations
+
+import ctypes
 import logging
 import math
+import os
+from multiprocessing import Pool
+from pathlib import Path
 
+import numpy as np
 from tqdm import tqdm
 from typeguard import typechecked
-from threading import Thread, Lock
 from benchmark import benchmark
 from logger import configure_logging
 
-primes = 0
-lock = Lock()
+# Optional Cython kernel for the marking loop, compiled on the first import.
+# The import hook of pyximport is removed right after, so it only sees _sieve.
+try:
+    import pyximport
 
-@typechecked
-def is_prime(n: int) -> bool:
+    importers = pyximport.install(language_level=3)
+    try:
+        from _sieve import sieve_segment
+    finally:
+        pyximport.uninstall(*importers)
+except ImportError:
+    sieve_segment = None
+
+# Upper bound (exclusive) of the prime search
+LIMIT = 1000000
+
+# Size of each segment sieved at once, small enough to stay in the cache
+SEGMENT_SIZE = 1 << 16
+
+# Sieve specialized for LIMIT and compiled with PGO by build_sieve.py
+SIEVE_LIBRARY = Path(__file__).resolve().parent / "sieve.so"
+
+
+def sieve_of_eratosthenes(n: int) -> np.ndarray:
     """
-    Check if a number is prime
+    Odd-only sieve where sieve[i] tells if 2 * i + 1 is prime, for 2 * i + 1 <= n.
+    Even numbers are never stored, which halves the memory of the table.
     """
-    if n <= 1:
-        return False
-    if n == 2:
-        return True
-    if n % 2 == 0:
-        return False
-    for i in range(3, int(math.sqrt(n)) + 1, 2):
-        if n % i == 0:
-            return False
-
-    return True
+    sieve = np.ones((n + 1) // 2, dtype=np.bool_)
+    # 1 is not a prime
+    sieve[:1] = False
+    for p in range(3, math.isqrt(n) + 1, 2):
+        if sieve[p // 2]:
+            # odd multiples of p are p apart in the odd-only table
+            sieve[(p * p) // 2 :: p] = False
+
+    return sieve
+
 
 @typechecked
-def search_primes(start: int, end: int):
-    global primes
-    local_primes = 0
-    for i in range(start, end):
-        if is_prime(i):
-            local_primes += 1
-    with lock:
-        primes += local_primes
+def count_primes_sieve(n: int) -> int:
+    """
+    Count the primes less than or equal to n using the sieve of Eratosthenes
+    """
+    if n < 2:
+        return 0
+    # 2 is the only even prime
+    return 1 + int(sieve_of_eratosthenes(n).sum())
 
-def threads():
-    global primes
-    primes = 0
-    hilos = []
 
-    hilo = Thread(target=search_primes, args=[1, 500000])
-    hilos.append(hilo)
-    hilo.start()
+def base_primes(n: int) -> list:
+    """
+    Return the primes less than or equal to n, used to sieve the segments
+    """
+    if n < 2:
+        return []
+    return [2] + (2 * np.flatnonzero(sieve_of_eratosthenes(n)) + 1).tolist()
+
+
+def search_primes(start: int, end: int, primes: list) -> int:
+    """
+    Count the primes in [start, end) sieving the odd numbers of the segment
+    with the base primes
+    """
+    if end <= start:
+        return 0
+    # 2 is the only even prime
+    count = 1 if start <= 2 < end else 0
+    # first odd number of the segment, segment[j] represents lo + 2 * j
+    lo = start | 1
+    if lo >= end:
+        return count
+    segment = np.ones((end - lo + 1) // 2, dtype=np.bool_)
+    # 1 is not a prime
+    if lo == 1:
+        segment[0] = False
+    if sieve_segment is not None:
+        sieve_segment(segment.view(np.uint8), lo, end, np.asarray(primes, dtype=np.int64))
+        return count + int(segment.sum())
+    for p in primes:
+        if p == 2:
+            continue
+        if p * p >= end:
+            break
+        first = max(p * p, ((lo + p - 1) // p) * p)
+        if first % 2 == 0:
+            first += p
+        segment[(first - lo) // 2 :: p] = False
+
+    return count + int(segment.sum())
+
+
+# Primes up to sqrt(LIMIT), computed once at import so the pool workers inherit them
+BASE_PRIMES = base_primes(math.isqrt(LIMIT))
+
+
+def _count_segment(bounds: tuple) -> int:
+    """
+    Worker of the process pool, counts the primes in [start, end)
+    """
+    start, end = bounds
+    return search_primes(start, end, BASE_PRIMES)
+
 
-    hilo = Thread(target=search_primes, args=[500001, 1000000])
-    hilos.append(hilo)
-    hilo.start()
+def parallel():
+    # one process per core, BASE_PRIMES is inherited by the workers
+    segments = [
+        (start, min(start + SEGMENT_SIZE, LIMIT))
+        for start in range(1, LIMIT, SEGMENT_SIZE)
+    ]
 
-    for h in hilos:
-        h.join()
-    return primes
+    with Pool(os.cpu_count()) as pool:
+        results = pool.map(_count_segment, segments)
+    return sum(results)
 
 
 def mono():
     local_primes = 0
-    for i in range(1, 1000000):
-        if is_prime(i):
-            local_primes += 1
+    for start in range(1, LIMIT, SEGMENT_SIZE):
+        local_primes += search_primes(start, min(start + SEGMENT_SIZE, LIMIT), BASE_PRIMES)
 
     return local_primes
 
+def compiled():
+    library = ctypes.CDLL(str(SIEVE_LIBRARY))
+    library.count_primes.restype = ctypes.c_int64
+    return library.count_primes()
+
 def main():
     configure_logging(log_level=logging.DEBUG)
     log = logging.getLogger(__name__)
     log.debug("Starting ..")
 
+    with benchmark(log=log):
+        log.debug(f"Primes in sieve: {count_primes_sieve(LIMIT - 1)}")
+
     with benchmark(log=log):
         log.debug(f"Primes in mono: {mono()}")
 
     with benchmark(log=log):
-        log.debug(f"Primes in threads: {threads()}")
+        log.debug(f"Primes in parallel: {parallel()}")
+
+    if SIEVE_LIBRARY.exists():
+        with benchmark(log=log):
+            log.debug(f"Primes in compiled: {compiled()}")
 
     log.debug("Done ...")
     pass
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
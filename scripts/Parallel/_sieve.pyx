@@ -0,0 +1,34 @@
+#  Copyright (c) 2025.  Departamento de Ingenieria de Sistemas y Computacion
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+
+
+def sieve_segment(
+    unsigned char[::1] segment,
+    long long lo,
+    long long end,
+    const long long[::1] primes,
+):
+    """
+    Mark the odd composites of [lo, end) in the odd-only segment, where
+    segment[j] represents lo + 2 * j and lo is odd
+    """
+    cdef Py_ssize_t size = segment.shape[0]
+    cdef Py_ssize_t k, i
+    cdef long long p, first
+
+    with nogil:
+        for k in range(primes.shape[0]):
+            p = primes[k]
+            if p == 2:
+                continue
+            if p * p >= end:
+                break
+            first = ((lo + p - 1) // p) * p
+            if first < p * p:
+                first = p * p
+            if first % 2 == 0:
+                first += p
+            i = (first - lo) // 2
+            while i < size:
+                segment[i] = 0
+                i += p
@@ -0,0 +1,165 @@
+#  Copyright (c) 2025.  Departamento de Ingenieria de Sistemas y Computacion
+"""
+Build sieve.so, the prime sieve of Prime.py specialized for LIMIT and compiled
+with profile guided optimization. Only GCC on a POSIX system is supported: the
+profile is recorded with -fprofile-generate/-fprofile-use, which under Clang also
+needs an llvm-profdata merge step, and the training binary is run as ./sieve_train.
+"""
+import logging
+import math
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from logger import configure_logging
+from Prime import LIMIT, SIEVE_LIBRARY, base_primes
+
+# Compiler and flags used for both builds
+COMPILER = "cc"
+CFLAGS = ["-O3", "-march=native", "-fPIC"]
+
+# Segmented odd-only sieve specialized for a fixed N: the bounds are constants
+# and the odd base primes up to sqrt(N) are an inlined table. When TRAINING is
+# defined a main is added to run it for the profile guided optimization.
+_SOURCE = r"""
+#include <stdint.h>
+#include <stdio.h>
+#include <string.h>
+
+#define N %(limit)dLL
+#define SEGMENT_SIZE %(segment_size)d
+
+static const uint32_t BASE_PRIMES[] = {%(primes)s};
+#define N_BASE_PRIMES (sizeof(BASE_PRIMES) / sizeof(BASE_PRIMES[0]))
+
+/* count the primes less than N */
+int64_t count_primes(void) {
+    static uint8_t segment[SEGMENT_SIZE];
+    /* 2 is the only even prime */
+    int64_t count = N > 2 ? 1 : 0;
+
+    /* segment[j] represents lo + 2 * j */
+    for (int64_t lo = 1; lo < N; lo += 2 * SEGMENT_SIZE) {
+        int64_t size = (N - lo + 1) / 2;
+        if (size > SEGMENT_SIZE) {
+            size = SEGMENT_SIZE;
+        }
+        int64_t end = lo + 2 * size;
+        memset(segment, 1, size);
+        /* 1 is not a prime */
+        if (lo == 1) {
+            segment[0] = 0;
+        }
+
+        for (size_t k = 0; k < N_BASE_PRIMES; k++) {
+            int64_t p = BASE_PRIMES[k];
+            if (p * p >= end) {
+                break;
+            }
+            int64_t first = ((lo + p - 1) / p) * p;
+            if (first < p * p) {
+                first = p * p;
+            }
+            if ((first & 1) == 0) {
+                first += p;
+            }
+            for (int64_t i = (first - lo) / 2; i < size; i += p) {
+                segment[i] = 0;
+            }
+        }
+
+        for (int64_t j = 0; j < size; j++) {
+            count += segment[j];
+        }
+    }
+    return count;
+}
+
+#ifdef TRAINING
+int main(void) {
+    int64_t count = 0;
+    for (int run = 0; run < 10; run++) {
+        count = count_primes();
+    }
+    printf("%%lld\n", (long long) count);
+    return 0;
+}
+#endif
+"""
+
+
+def generate_source(limit: int, segment_size: int = 1 << 15) -> str:
+    """
+    C source of the sieve specialized for the primes less than limit
+    """
+    primes = base_primes(math.isqrt(limit))[1:]
+    return _SOURCE % {
+        "limit": limit,
+        "segment_size": segment_size,
+        "primes": ", ".join(str(p) for p in primes),
+    }
+
+
+def check_toolchain() -> None:
+    """
+    Raise RuntimeError unless COMPILER is GCC on a POSIX system
+    """
+    if os.name != "posix":
+        raise RuntimeError("build_sieve.py only supports GCC on POSIX systems")
+    try:
+        version = subprocess.run(
+            [COMPILER, "--version"], capture_output=True, text=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError) as error:
+        raise RuntimeError(f"The compiler {COMPILER} is not available: {error}") from error
+    # Clang also answers to cc and gcc on some systems, only GCC prints this banner
+    if "Free Software Foundation" not in version:
+        name = version.partition("\n")[0]
+        raise RuntimeError(f"build_sieve.py needs GCC, {COMPILER} is: {name}")
+
+
+def build(limit: int = LIMIT, output: Path = SIEVE_LIBRARY) -> Path:
+    """
+    Compile the sieve with profile guided optimization: an instrumented build
+    is run once to record a profile and the library is compiled using it
+    """
+    log = logging.getLogger(__name__)
+    check_toolchain()
+
+    with tempfile.TemporaryDirectory() as build_dir:
+        def run(*command: str) -> None:
+            log.debug(" ".join(command))
+            subprocess.run(command, cwd=build_dir, check=True)
+
+        (Path(build_dir) / "sieve.c").write_text(generate_source(limit))
+
+        # instrumented build, the training run writes sieve.gcda
+        run(COMPILER, *CFLAGS, "-fprofile-generate", "-DTRAINING", "-c", "sieve.c", "-o", "sieve.o")
+        run(COMPILER, "-fprofile-generate", "sieve.o", "-o", "sieve_train")
+        run("./sieve_train")
+
+        # optimized build using the recorded profile
+        run(COMPILER, *CFLAGS, "-fprofile-use", "-c", "sieve.c", "-o", "sieve.o")
+        run(COMPILER, "-shared", "sieve.o", "-o", str(output))
+
+    return output
+
+
+def main():
+    configure_logging(log_level=logging.DEBUG)
+    log = logging.getLogger(__name__)
+    log.debug("Starting ..")
+
+    try:
+        log.debug(f"Library built: {build()}")
+    except RuntimeError as error:
+        log.error(error)
+        sys.exit(1)
+
+    log.debug("Done ...")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#  Copyright (c) 2025.  Departamento de Ingenieria de Sistemas y Computacion
+import logging
+import math
+
+import numpy as np
+
+from benchmark import benchmark
+from gpu import gpu_available
+from logger import configure_logging
+from Prime import base_primes, search_primes
+
+# Upper bound (inclusive) of the prime search
+LIMIT = 1000000000
+
+# Odd numbers sieved by each CUDA block, the segment lives in shared memory
+SEGMENT_SIZE = 1 << 15
+
+# Threads of each CUDA block
+THREADS = 256
+
+# Numbers sieved at once by the CPU fallback, the odd ones of a segment take
+# 1 MiB, so the memory does not grow with n
+HOST_SEGMENT_SIZE = 1 << 21
+
+# Each block sieves one segment of odd numbers in shared memory: the threads
+# share out the base primes, mark their odd multiples and then count the
+# unmarked numbers, adding the result to a global counter.
+# The kernel has not been run on a CUDA device yet, test_prime_gpu.py checks it
+# against count_primes_cpu and is skipped when there is no device.
+_KERNEL_SOURCE = r"""
+#define SEGMENT_SIZE %(segment_size)d
+
+extern "C" __global__
+void count_segments(
+    const long long* primes,
+    const int n_primes,
+    const long long n,
+    unsigned long long* total
+) {
+    __shared__ unsigned char segment[SEGMENT_SIZE];
+
+    // segment[j] represents lo + 2 * j
+    const long long lo = 1 + 2LL * SEGMENT_SIZE * blockIdx.x;
+
+    for (int j = threadIdx.x; j < SEGMENT_SIZE; j += blockDim.x) {
+        segment[j] = 1;
+    }
+    __syncthreads();
+
+    for (int k = threadIdx.x; k < n_primes; k += blockDim.x) {
+        const long long p = primes[k];
+        long long first = ((lo + p - 1) / p) * p;
+        if (first < p * p) {
+            first = p * p;
+        }
+        if ((first & 1) == 0) {
+            first += p;
+        }
+        for (long long i = (first - lo) / 2; i < SEGMENT_SIZE; i += p) {
+            segment[i] = 0;
+        }
+    }
+    __syncthreads();
+
+    unsigned long long count = 0;
+    for (int j = threadIdx.x; j < SEGMENT_SIZE; j += blockDim.x) {
+        const long long value = lo + 2LL * j;
+        if (segment[j] && value > 1 && value <= n) {
+            count++;
+        }
+    }
+    atomicAdd(total, count);
+}
+""" % {"segment_size": SEGMENT_SIZE}
+
+
+def count_primes_cuda(n: int) -> int:
+    """
+    Count the primes less than or equal to n with a segmented sieve on the GPU
+    """
+    import cupy as cp
+
+    if n < 2:
+        return 0
+
+    # the odd base primes are computed on the host and uploaded once
+    primes = cp.asarray(np.asarray(base_primes(math.isqrt(n))[1:], dtype=np.int64))
+    total = cp.zeros(1, dtype=cp.uint64)
+
+    kernel = cp.RawKernel(_KERNEL_SOURCE, "count_segments")
+    blocks = -(-((n + 1) // 2) // SEGMENT_SIZE)
+    kernel(
+        (blocks,),
+        (THREADS,),
+        (primes, np.int32(primes.size), np.int64(n), total),
+    )
+
+    # 2 is the only even prime
+    return 1 + int(total.get()[0])
+
+
+def count_primes_cpu(n: int) -> int:
+    """
+    Count the primes less than or equal to n with a segmented sieve on the CPU
+    """
+    if n < 2:
+        return 0
+
+    primes = base_primes(math.isqrt(n))
+    return sum(
+        search_primes(start, min(start + HOST_SEGMENT_SIZE, n + 1), primes)
+        for start in range(0, n + 1, HOST_SEGMENT_SIZE)
+    )
+
+
+def count_primes(n: int) -> int:
+    """
+    Count the primes less than or equal to n, on the GPU when CuPy is installed
+    and there is a CUDA device
+    """
+    if not gpu_available():
+        return count_primes_cpu(n)
+    return count_primes_cuda(n)
+
+
+def main():
+    configure_logging(log_level=logging.DEBUG)
+    log = logging.getLogger(__name__)
+    log.debug("Starting ..")
+
+    if not gpu_available():
+        log.warning("CuPy or a CUDA device is not available, counting the primes on the CPU")
+
+    with benchmark(operation_name="count_primes", log=log):
+        log.debug(f"Primes up to {LIMIT}: {count_primes(LIMIT)}")
+
+    log.debug("Done ...")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#  Copyright (c) 2025.  Departamento de Ingenieria de Sistemas y Computacion
+import logging
+import math
+
+from numba import njit, prange
+
+from benchmark import benchmark
+from logger import configure_logging
+
+# Upper bound (exclusive) of the prime search
+LIMIT = 1000000
+
+# Odd primes below 256, tried before the generic odd divisors
+SMALL_PRIMES = tuple(
+    p for p in range(3, 256, 2) if all(p % q for q in range(3, math.isqrt(p) + 1, 2))
+)
+
+
+@njit(cache=True)
+def _is_prime(n: int) -> bool:
+    """
+    Check if a number is prime, compiled to native code by Numba
+    """
+    if n <= 1:
+        return False
+    if n == 2:
+        return True
+    if n % 2 == 0:
+        return False
+    for p in SMALL_PRIMES:
+        if p * p > n:
+            return True
+        if n % p == 0:
+            return n == p
+    i = 257
+    while i * i <= n:
+        if n % i == 0:
+            return False
+        i += 2
+
+    return True
+
+
+@njit(parallel=True, cache=True)
+def count_primes(n: int) -> int:
+    """
+    Count the primes less than n, prange splits the range across the cores
+    and reduces the total without a lock.
+    Only the odd candidates 2 * k + 1 are tested, 2 is counted apart.
+    """
+    total = 1 if n > 2 else 0
+    for k in prange(1, n // 2):
+        if _is_prime(2 * k + 1):
+            total += 1
+
+    return total
+
+
+def main():
+    configure_logging(log_level=logging.DEBUG)
+
+    # hide the compiler logs
+    logging.getLogger("numba").setLevel(logging.WARNING)
+
+    log = logging.getLogger(__name__)
+    log.debug("Starting ..")
+
+    # the first call includes the compilation (or the load from the cache)
+    with benchmark(operation_name="compile", log=log):
+        count_primes(10)
+
+    with benchmark(operation_name="count_primes", log=log):
+        log.debug(f"Primes in numba: {count_primes(LIMIT)}")
+
+    log.debug("Done ...")
+
+
+if __name__ == "__main__":
+    main()
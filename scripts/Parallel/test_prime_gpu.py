@@ -0,0 +1,28 @@
+#  Copyright (c) 2025.  Departamento de Ingenieria de Sistemas y Computacion
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "libs")))
+
+from gpu import gpu_available
+from prime_gpu import SEGMENT_SIZE, count_primes_cpu, count_primes_cuda
+
+
+@unittest.skipUnless(gpu_available(), "CuPy with a CUDA device is not available")
+class CountPrimesCudaTest(unittest.TestCase):
+    """
+    The shared-memory sieve must count the same primes as the CPU sieve
+    """
+
+    # Small bounds, the bounds of a segment and more than one segment
+    LIMITS = (0, 1, 2, 3, 10, 100, 1000, 2 * SEGMENT_SIZE, 2 * SEGMENT_SIZE + 1, 10**6 + 3)
+
+    def test_matches_cpu(self):
+        for n in self.LIMITS:
+            with self.subTest(n=n):
+                self.assertEqual(count_primes_cuda(n), count_primes_cpu(n))
+
+
+if __name__ == "__main__":
+    unittest.main()
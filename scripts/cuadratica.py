@@ -7,21 +7,29 @@ def cuadratica(a: float, b: float, c: float):
     Función que resuelve una ecuación cuadrática de la forma ax^2 + bx + c = 0
     """
 
-    print(type(a))
     if a == 0:
         print("El coeficiente a no puede ser cero")
         return None, None
 
-    discriminante = b**2 - 4 * a * c
+    discriminante = b * b - 4 * a * c
     if discriminante < 0:
         print("La ecuación no tiene solución real")
         return None, None
 
+    """
+    Forma estable: q toma el signo de b, asi -b y la raiz nunca se restan
+    y no se pierde precision cuando b^2 es mucho mayor que 4ac
+    """
     raiz = math.sqrt(discriminante)
-    res1 = (-b + raiz) / (2 * a)
-    res2 = (-b - raiz) / (2 * a)
-
-    return res1, res2
+    signo = math.copysign(1.0, b)
+    q = -0.5 * (b + signo * raiz)
+    if q == 0:
+        return 0.0, 0.0
+
+    # se mantiene el orden (-b + raiz) / 2a, (-b - raiz) / 2a
+    if signo > 0:
+        return c / q, q / a
+    return q / a, c / q
 
 def pedir_coeficientes(mensaje):
     """
@@ -1,4 +1,7 @@
 #  Copyright (c) 2025.  Departamento de Ingenieria de Sistemas y Computacion
+import sys
+
+import numpy as np
 
 
 def fizzbuzz(n):
@@ -6,16 +9,17 @@ def fizzbuzz(n):
     Función que imprime los números del 1 al n, pero por cada múltiplo de 3 imprime "Fizz",
     por cada múltiplo de 5 imprime "Buzz" y por cada múltiplo de 15 imprime "FizzBuzz".
     """
+    if n < 1:
+        return
+
+    # se calculan todas las lineas de una vez y se escriben con una sola llamada
+    numeros = np.arange(1, n + 1)
+    salida = numeros.astype(str)
+    salida[numeros % 3 == 0] = "Fizz"
+    salida[numeros % 5 == 0] = "Buzz"
+    salida[numeros % 15 == 0] = "FizzBuzz"
 
-    for i in range(1, n + 1):
-        if i % 15 == 0:
-            print("FizzBuzz")
-        elif i % 3 == 0:
-            print("Fizz")
-        elif i % 5 == 0:
-            print("Buzz")
-        else:
-            print(i)
+    sys.stdout.write("\n".join(salida.tolist()) + "\n")
 
 
 def main():
@@ -1,10 +1,68 @@
 #  Copyright (c) 2025.  Departamento de Ingenieria de Sistemas y Computacion
 import logging
+import subprocess
+from typing import Generator
 
-from pydub import AudioSegment
+import numpy as np
+from pydub.utils import get_encoder_name, mediainfo
 
 from logger import configure_logging
 
+# Sample rate of the decoded mono signal
+SAMPLE_RATE = 22050
+
+# Bytes read from the decoder on each block (32768 int16 samples)
+CHUNK_SIZE = 65536
+
+
+def stream_audio(
+    file: str,
+    sample_rate: int = SAMPLE_RATE,
+    chunk_size: int = CHUNK_SIZE,
+) -> Generator[np.ndarray, None, None]:
+    """
+    Decode the audio file with ffmpeg and yield it as blocks of mono int16 samples,
+    so the whole song is never held in memory
+    """
+    command = [
+        get_encoder_name(),
+        "-v", "quiet",
+        "-i", file,
+        "-f", "s16le",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-",
+    ]
+    with subprocess.Popen(command, stdout=subprocess.PIPE) as process:
+        while True:
+            data = process.stdout.read(chunk_size)
+            if not data:
+                break
+            yield np.frombuffer(data, dtype=np.int16)
+
+    if process.returncode != 0:
+        raise RuntimeError(f"Could not decode the file: {file}")
+
+
+def frequency_spectrum(
+    file: str,
+    sample_rate: int = SAMPLE_RATE,
+    chunk_size: int = CHUNK_SIZE,
+) -> tuple:
+    """
+    Average magnitude spectrum of the song, accumulated block by block while it is decoded
+    """
+    frame = chunk_size // 2
+    spectrum = np.zeros(frame // 2 + 1)
+    blocks = 0
+    for block in stream_audio(file, sample_rate, chunk_size):
+        # the last block is zero padded to the frame size
+        spectrum += np.abs(np.fft.rfft(block, n=frame))
+        blocks += 1
+
+    frequencies = np.fft.rfftfreq(frame, d=1 / sample_rate)
+    return frequencies, spectrum / max(blocks, 1)
+
 
 def main():
     configure_logging(log_level=logging.DEBUG)
@@ -14,11 +72,14 @@ def main():
     file = "..\\data\\songs\\kansas-carry-on-wayward-son.mp3"
     log.debug(f"Reading file: {file} ...")
 
-    audio = AudioSegment.from_file(file)
-    log.debug(f"File loaded: {audio} ...")
+    info = mediainfo(file)
+    log.debug(f"File info: {info.get('duration')} seconds at {info.get('sample_rate')} Hz ...")
+
+    frequencies, spectrum = frequency_spectrum(file)
+    log.debug(f"Dominant frequency: {frequencies[np.argmax(spectrum)]:.2f} Hz ...")
 
     log.debug("Done.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
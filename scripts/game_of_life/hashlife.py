@@ -0,0 +1,235 @@
+#  Copyright (c) 2025.  Departamento de Ingenieria de Sistemas y Computacion
+"""
+Hashlife implementation of Conway's Game of Life.
+
+The grid is stored as a quadtree where equal sub-grids are the same node, and
+the evolution of each node is memoized: a node of level k (2^k x 2^k cells)
+knows its center 2^(k-2) generations later. Patterns with repeated structure
+are advanced an exponential number of generations in near linear time.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+# A quadtree node of 2^level x 2^level cells with its four quadrants
+Node = namedtuple("Node", "nw ne sw se level population")
+
+# Dead and alive cells, the leaves of every tree
+OFF = Node(None, None, None, None, 0, 0)
+ON = Node(None, None, None, None, 0, 1)
+
+# Interned nodes by the identity of their quadrants
+_nodes = {}
+
+# Memoized results of successor by node and step
+_successors = {}
+
+# Empty node of each level
+_zeros = {}
+
+
+def join(nw: Node, ne: Node, sw: Node, se: Node) -> Node:
+    """
+    Returns the unique node with the given quadrants
+    """
+    key = (id(nw), id(ne), id(sw), id(se))
+    node = _nodes.get(key)
+    if node is None:
+        population = nw.population + ne.population + sw.population + se.population
+        node = Node(nw, ne, sw, se, nw.level + 1, population)
+        _nodes[key] = node
+    return node
+
+
+def zero(level: int) -> Node:
+    """
+    Returns the empty node of the given level
+    """
+    node = _zeros.get(level)
+    if node is None:
+        node = OFF if level == 0 else join(*(zero(level - 1),) * 4)
+        _zeros[level] = node
+    return node
+
+
+def centre(node: Node) -> Node:
+    """
+    Returns the node of the next level with node in its center, surrounded by DEAD cells
+    """
+    border = zero(node.level - 1)
+    return join(
+        join(border, border, border, node.nw),
+        join(border, border, node.ne, border),
+        join(border, node.sw, border, border),
+        join(node.se, border, border, border),
+    )
+
+
+def _life_4x4(node: Node) -> Node:
+    """
+    Center 2x2 of a 4x4 node after one generation
+    """
+    cells = [
+        [node.nw.nw, node.nw.ne, node.ne.nw, node.ne.ne],
+        [node.nw.sw, node.nw.se, node.ne.sw, node.ne.se],
+        [node.sw.nw, node.sw.ne, node.se.nw, node.se.ne],
+        [node.sw.sw, node.sw.se, node.se.sw, node.se.se],
+    ]
+
+    def next_cell(row, col):
+        neighbors = sum(
+            cells[r][c].population
+            for r in range(row - 1, row + 2)
+            for c in range(col - 1, col + 2)
+            if r != row or c != col
+        )
+        alive = cells[row][col].population
+        return ON if neighbors == 3 or (alive and neighbors == 2) else OFF
+
+    return join(next_cell(1, 1), next_cell(1, 2), next_cell(2, 1), next_cell(2, 2))
+
+
+def successor(node: Node, j: int) -> Node:
+    """
+    Center of the node (one level below) after 2^j generations, j <= level - 2
+    """
+    key = (id(node), j)
+    result = _successors.get(key)
+    if result is not None:
+        return result
+
+    if node.population == 0:
+        result = node.nw
+    elif node.level == 2:
+        result = _life_4x4(node)
+    else:
+        j = min(j, node.level - 2)
+        nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+
+        # the 9 overlapping sub-nodes of the next level below, advanced 2^j generations
+        # when j is the maximum step, half of it is done here and half below
+        step = j if j < node.level - 2 else j - 1
+        c1 = successor(nw, step)
+        c2 = successor(join(nw.ne, ne.nw, nw.se, ne.sw), step)
+        c3 = successor(ne, step)
+        c4 = successor(join(nw.sw, nw.se, sw.nw, sw.ne), step)
+        c5 = successor(join(nw.se, ne.sw, sw.ne, se.nw), step)
+        c6 = successor(join(ne.sw, ne.se, se.nw, se.ne), step)
+        c7 = successor(sw, step)
+        c8 = successor(join(sw.ne, se.nw, sw.se, se.sw), step)
+        c9 = successor(se, step)
+
+        if j < node.level - 2:
+            result = join(
+                join(c1.se, c2.sw, c4.ne, c5.nw),
+                join(c2.se, c3.sw, c5.ne, c6.nw),
+                join(c4.se, c5.sw, c7.ne, c8.nw),
+                join(c5.se, c6.sw, c8.ne, c9.nw),
+            )
+        else:
+            result = join(
+                successor(join(c1, c2, c4, c5), step),
+                successor(join(c2, c3, c5, c6), step),
+                successor(join(c4, c5, c7, c8), step),
+                successor(join(c5, c6, c8, c9), step),
+            )
+
+    _successors[key] = result
+    return result
+
+
+def _is_padded(node: Node) -> bool:
+    """
+    True if all the ALIVE cells are in the central quarter (2^(level-2) wide) of the node
+    """
+    inner = (
+        node.nw.se.se.population
+        + node.ne.sw.sw.population
+        + node.sw.ne.ne.population
+        + node.se.nw.nw.population
+    )
+    return inner == node.population
+
+
+def advance(node: Node, generations: int) -> Node:
+    """
+    Returns the node advanced the given number of generations, one successor call
+    for each bit set in generations
+    """
+    j = 0
+    while generations > 0:
+        if generations & 1:
+            # enough DEAD border so the pattern can not grow out of the result
+            while node.level < j + 3 or not _is_padded(node):
+                node = centre(node)
+            node = successor(node, j)
+        generations >>= 1
+        j += 1
+    return node
+
+
+def from_array(state: np.ndarray) -> Node:
+    """
+    Builds the quadtree of a 2D array of cells, padded with DEAD cells to a power of 2
+    """
+    rows, cols = state.shape
+    level = max(3, int(max(rows, cols) - 1).bit_length())
+    size = 1 << level
+    grid = [[OFF] * size for _ in range(size)]
+    for r, c in zip(*np.nonzero(state), strict=True):
+        grid[r][c] = ON
+
+    while size > 1:
+        size //= 2
+        grid = [
+            [
+                join(
+                    grid[2 * r][2 * c],
+                    grid[2 * r][2 * c + 1],
+                    grid[2 * r + 1][2 * c],
+                    grid[2 * r + 1][2 * c + 1],
+                )
+                for c in range(size)
+            ]
+            for r in range(size)
+        ]
+    return grid[0][0]
+
+
+def to_array(node: Node) -> np.ndarray:
+    """
+    Returns the smallest 2D uint8 array with all the ALIVE cells of the node
+    """
+    cells = []
+
+    def collect(node, row, col):
+        if node.population == 0:
+            return
+        if node.level == 0:
+            cells.append((row, col))
+            return
+        half = 1 << (node.level - 1)
+        collect(node.nw, row, col)
+        collect(node.ne, row, col + half)
+        collect(node.sw, row + half, col)
+        collect(node.se, row + half, col + half)
+
+    collect(node, 0, 0)
+    if not cells:
+        return np.zeros((1, 1), dtype=np.uint8)
+
+    rows, cols = np.array(cells).T
+    state = np.zeros(
+        (rows.max() - rows.min() + 1, cols.max() - cols.min() + 1), dtype=np.uint8
+    )
+    state[rows - rows.min(), cols - cols.min()] = 1
+    return state
+
+
+def clear_cache():
+    """
+    Releases the interned nodes and the memoized results
+    """
+    _nodes.clear()
+    _successors.clear()
+    _zeros.clear()
@@ -9,24 +9,35 @@ por Don John Conway en 1970.
 En cada celda se puede encontrar una celula que podría estar viva o muerta
 dependiendo de los vecinos que tienen.
 
+El estado es una matriz de NumPy de tipo int8 y las funciones que lo recorren
+se compilan con Numba, asi los ciclos se ejecutan como codigo nativo. Sin Numba
+las mismas funciones se ejecutan como Python, mas lento.
+
 """
+import numpy as np
 
+# Numba es opcional, sin el njit deja las funciones tal como estan
+try:
+    from numba import njit
+except ImportError:
+
+    def njit(*args, **kwargs):
+        return lambda funcion: funcion
 
-def contar_vecinos(estado, fila, columna):
 
+@njit(cache=True)
+def contar_vecinos(estado, fila, columna):
+    """
+    Cuenta los vecinos vivos de una celda, el estado debe tener un borde de celulas
+    muertas para no revisar los limites de la matriz
+    """
     contador_vecinos = 0
 
     for f in range(fila - 1, fila + 2):
         for c in range(columna - 1, columna + 2):
-            if f == fila and c == columna:
-                continue
-            if f < 0 or f >= len(estado):
-                continue
-            if c < 0 or c >= len(estado[0]):
-                continue
-            if estado[f][c] == 1:
-                contador_vecinos += 1
-    return contador_vecinos
+            contador_vecinos += estado[f, c]
+    # la celda no es vecina de si misma
+    return contador_vecinos - estado[fila, columna]
 
 
 def imprimir_estado(estado):
@@ -35,53 +46,30 @@ def imprimir_estado(estado):
         print(''.join('࿕' if celula == 1 else '.' for celula in fila))
 
 
+@njit(cache=True)
 def crear_nuevo_estado(estado):
-    n_filas = len(estado)
-    n_columnas = len(estado[0])
-
-    nuevo_estado = []
-
-    for f in range(n_filas):
-        # construyo una nueva fila
-        nueva_fila = []
-        for c in range(n_columnas):
-            # agrego el valor segun la fila y la columna a la matriz
-            nueva_fila.append(0)
-        nuevo_estado.append(nueva_fila)
-    return nuevo_estado
+    # matriz de celulas muertas del mismo tamaño, una sola reserva de memoria
+    return np.zeros_like(estado)
 
+@njit(cache=True)
 def expandir(estado):
     """
     Funcion que agrega una fila y una columna al inicio y al final de una matriz
     """
-    n_filas = len(estado)
-    n_columnas = len(estado[0])
-
-    nuevo_estado = []
+    n_filas, n_columnas = estado.shape
 
-    for f in range(n_filas + 2):
-        # construyo una nueva fila
-        nueva_fila = []
-        for c in range(n_columnas + 2):
-            # agrego el valor segun la fila y la columna a la matriz
-            nueva_fila.append(0)
-        nuevo_estado.append(nueva_fila)
-
-    for f in range(n_filas):
-        for c in range(n_columnas):
-            nuevo_estado[f+1][c+1] = estado[f][c]
+    nuevo_estado = np.zeros((n_filas + 2, n_columnas + 2), dtype=np.int8)
+    nuevo_estado[1:-1, 1:-1] = estado
 
     return nuevo_estado
 
+@njit(cache=True)
 def reducir(estado):
     """
     Elimina las filas y columnas sobrantes en la matriz luego de una expansion
     """
 
-    n_filas = len(estado)
-    n_columnas = len(estado[0])
-
-    nuevo_estado = []
+    n_filas, n_columnas = estado.shape
 
     filas_sobrantes_superior = 0
     filas_sobrantes_inferior = 0
@@ -91,7 +79,7 @@ def reducir(estado):
     for fila in range(n_filas):
         condicion_ceros = True
         for columna in range(n_columnas):
-            if estado[fila][columna] != 0:
+            if estado[fila, columna] != 0:
                 condicion_ceros = False
                 break
         if condicion_ceros:
@@ -102,7 +90,7 @@ def reducir(estado):
     for fila in range(n_filas - 1, -1, -1):
         condicion_ceros = True
         for columna in range(n_columnas):
-            if estado[fila][columna] != 0:
+            if estado[fila, columna] != 0:
                 condicion_ceros = False
                 break
         if condicion_ceros:
@@ -112,8 +100,8 @@ def reducir(estado):
 
     for columna in range(n_columnas):
         condicion_ceros = True
-        for fila in range(n_filas   ):
-            if estado[fila][columna] != 0:
+        for fila in range(n_filas):
+            if estado[fila, columna] != 0:
                 condicion_ceros = False
                 break
         if condicion_ceros:
@@ -124,7 +112,7 @@ def reducir(estado):
     for columna in range(n_columnas - 1, -1, -1):
         condicion_ceros = True
         for fila in range(n_filas):
-            if estado[fila][columna] != 0:
+            if estado[fila, columna] != 0:
                 condicion_ceros = False
                 break
         if condicion_ceros:
@@ -138,58 +126,51 @@ def reducir(estado):
     columna_final = n_columnas - columnas_sobrantes_derecha
 
     if fila_inicio >= fila_final or columna_inicio >= columna_final:
-        print(f"Se acabo la vida dentro de la matriz")
-        return [[0]] # Retorno una matriz vacia
+        print("Se acabo la vida dentro de la matriz")
+        return np.zeros((1, 1), dtype=np.int8) # Retorno una matriz vacia
 
-    for fila in range(fila_inicio, fila_final):
-        nueva_fila = []
-        for columna in range(columna_inicio, columna_final):
-            nueva_fila.append(estado[fila][columna])
-        nuevo_estado.append(nueva_fila)
-
-
-    return nuevo_estado
+    return estado[fila_inicio:fila_final, columna_inicio:columna_final].copy()
 
 
+@njit(cache=True)
 def evolucionar(estado):
     estado = expandir(estado)
+    # borde extra de celulas muertas para contar los vecinos sin revisar los limites
+    estado_con_borde = expandir(estado)
 
     nuevo_estado = crear_nuevo_estado(estado)
+    n_filas, n_columnas = estado.shape
 
-    for f in range(len(estado)):
-        for c in range(len(estado[0])):
-            n_vecinos = contar_vecinos(estado, f, c)
+    for f in range(n_filas):
+        for c in range(n_columnas):
+            n_vecinos = contar_vecinos(estado_con_borde, f + 1, c + 1)
 
-            if estado[f][c] == 1:
+            if estado[f, c] == 1:
                 if n_vecinos < 2 or n_vecinos > 3:
-                    nuevo_estado[f][c] = 0
+                    nuevo_estado[f, c] = 0
                 else:
-                    nuevo_estado[f][c] = 1
+                    nuevo_estado[f, c] = 1
             else:
                 if n_vecinos == 3:
-                    nuevo_estado[f][c] = 1
+                    nuevo_estado[f, c] = 1
                 else:
-                    nuevo_estado[f][c] = 0
+                    nuevo_estado[f, c] = 0
     return nuevo_estado
 
 
+@njit(cache=True)
 def contar_poblacion(estado):
-    celulas = 0
-    for fila in estado:
-        for columna in fila:
-            # Si en cada una de las celdas es un 1, lo cuento y si es un cero no
-            if columna == 1:
-                celulas += 1
-    return celulas
+    # las celulas vivas valen 1 y las muertas 0
+    return int(estado.sum())
 
 
 def main():
     # Matriz que contiene el estado inicial del juego de la vida
-    estado = [
+    estado = np.array([
         [1, 1, 0],
         [0, 1, 1],
         [0, 1, 0],
-    ]
+    ], dtype=np.int8)
 
     print(f"Estado inicial con poblacion de: {contar_poblacion(estado)}")
     imprimir_estado(estado)
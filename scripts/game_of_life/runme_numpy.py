@@ -1,6 +1,10 @@
 #  Copyright (c) 2025.  Departamento de Ingenieria de Sistemas y Computacion
+from __future__ import annotations
+
 import logging
-from dataclasses import dataclass
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from typing import ClassVar, List, Optional
 import numpy as np
 from matplotlib import pyplot as plt
@@ -8,13 +12,385 @@ from tqdm import tqdm
 from typeguard import typechecked
 import seaborn as sns
 import matplotlib
-from scipy.signal import convolve2d
 from libs.benchmark import benchmark
+from libs.gpu import gpu_available
 from libs.logger import configure_logging
+from hashlife import advance, clear_cache, from_array, to_array
+
+# Numba is optional, without it the numba kernel is not available
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# without a display the current backend is kept, so the module can be imported headless
+matplotlib.use("TkAgg", force=False)
+
+# Rows of each stripe evolved by a thread of the threads kernel
+STRIPE_ROWS = 256
+
+# Cells of each block of rows evolved at once by the numpy kernel, the block
+# and its partial sums stay in the L2 cache through the ufunc passes
+BLOCK_CELLS = 1 << 17
+
+# DEAD cells left around the pattern by the kernels of GRIDS, the pattern can
+# grow for GRID_MARGIN - 1 generations before the grid is built again
+GRID_MARGIN = 64
+
+# Smaller grids are kept on the CPU by the cupy kernel, the launches of the
+# CUDA kernel would take longer than the generation
+CUPY_MIN_CELLS = 1 << 16
+
+# Side of the CUDA blocks of the cupy kernel, one thread per cell
+CUDA_BLOCK = 16
+
+
+def evolve_numpy(padded: np.ndarray, new_state: np.ndarray, scratch: np.ndarray):
+    """
+    Writes in new_state the next generation of padded[1:-1, 1:-1], padded has a
+    border of 1 cell around it. scratch is a buffer with the rows of new_state
+    and the columns of padded.
+    """
+    rows, cols = new_state.shape
+
+    # large grids are evolved by blocks of rows, each one read with its halo
+    block_rows = max(1, BLOCK_CELLS // (cols + 2))
+    if rows > block_rows:
+        for top in range(0, rows, block_rows):
+            bottom = min(top + block_rows, rows)
+            evolve_numpy(padded[top : bottom + 2], new_state[top:bottom], scratch[top:bottom])
+        return
+
+    """
+    The 3x3 sum is separable: the cells are first added by columns of 3 and
+    those partial sums by rows of 3, 4 additions instead of 8 shifted views.
+    The total includes the cell itself.
+    """
+    np.add(padded[:-2], padded[1:-1], out=scratch)
+    np.add(scratch, padded[2:], out=scratch)
+    np.add(scratch[:, :-2], scratch[:, 1:-1], out=new_state)
+    np.add(new_state, scratch[:, 2:], out=new_state)
+
+    """
+    A cell is ALIVE in the next generation if it has 3 neighbors, or if it is
+    ALIVE and has 2 neighbors, that is when neighbors | cell is 3, a branchless
+    rule without masks or scatter writes. The neighbors are total - cell.
+    """
+    cells = padded[1:-1, 1:-1]
+    np.subtract(new_state, cells, out=new_state)
+    np.bitwise_or(new_state, cells, out=new_state)
+    np.equal(new_state, 3, out=new_state)
+
+
+def _add_bit(planes: list, bit: np.ndarray):
+    """
+    Adds a bit plane to the counter stored in the bit planes of its binary digits
+    (ones, twos, fours), the count is kept modulo 8
+    """
+    carry = planes[0] & bit
+    planes[0] ^= bit
+    bit, carry = carry, planes[1] & carry
+    planes[1] ^= bit
+    planes[2] ^= carry
+
+
+# Number of bits set in every 16-bit value, used when np.bitwise_count is missing
+POPCOUNT_16 = np.unpackbits(
+    np.arange(1 << 16, dtype="<u2").view(np.uint8).reshape(-1, 2), axis=1
+).sum(axis=1, dtype=np.uint8)
+
+
+class PackedGrid:
+    """
+    Cells packed as bits in rows of uint64 words, bit j of a row of words is the
+    cell of column j. The grid is evolved in place with SWAR, so every bitwise
+    operation updates 64 cells at once, and the cells are only unpacked when the
+    state is read.
+    """
+
+    def __init__(self, state: np.ndarray, margin: int):
+        rows, cols = state.shape
+        n_words = -(-(cols + 2 * margin) // 64)
+        cells = np.zeros((rows + 2 * margin, 64 * n_words), dtype=np.uint8)
+        cells[margin : margin + rows, margin : margin + cols] = state
+        self.words = np.packbits(cells, axis=1, bitorder="little").view("<u8")
+        # the next generation is written in the second buffer, its first and last rows stay DEAD
+        self.back = np.zeros_like(self.words)
+
+    def evolve(self):
+        """
+        Writes the next generation of the inner rows in the back buffer and swaps
+        the buffers, the cells beyond the edges of the grid are DEAD
+        """
+        one, last = np.uint64(1), np.uint64(63)
+
+        def west(w):
+            # the cell of column j - 1 moved to bit j, with the carry from the previous word
+            shifted = w << one
+            shifted[:, 1:] |= w[:, :-1] >> last
+            return shifted
+
+        def east(w):
+            # the cell of column j + 1 moved to bit j, with the carry from the next word
+            shifted = w >> one
+            shifted[:, :-1] |= w[:, 1:] << last
+            return shifted
+
+        words = self.words
+        up, middle, down = words[:-2], words[1:-1], words[2:]
+
+        # the number of neighbors as 3 planes of binary digits, 8 neighbors wrap to 0
+        planes = [np.zeros_like(middle) for _ in range(3)]
+        for bit in (
+            west(up), up, east(up),
+            west(middle), east(middle),
+            west(down), down, east(down),
+        ):
+            _add_bit(planes, bit)
+
+        # ALIVE with 2 or 3 neighbors (twos set, fours clear) if ALIVE or the ones set
+        ones, twos, fours = planes
+        np.bitwise_and(twos, ~fours, out=self.back[1:-1])
+        self.back[1:-1] &= ones | middle
+        self.words, self.back = self.back, words
+
+    def population(self) -> int:
+        """
+        Number of ALIVE cells counted with a popcount of the words, 64 cells at once
+        """
+        # bitwise_count is the hardware popcount, it was added in NumPy 2.0
+        if hasattr(np, "bitwise_count"):
+            return int(np.bitwise_count(self.words).sum(dtype=np.int64))
+        return int(POPCOUNT_16[self.words.view(np.uint16)].sum(dtype=np.int64))
+
+    def to_array(self) -> np.ndarray:
+        """
+        The cells of the grid as one byte per cell
+        """
+        return np.unpackbits(self.words.view(np.uint8), axis=1, bitorder="little")
+
+
+def _block_table() -> np.ndarray:
+    """
+    Next generation of the 2x2 center of every 4x4 block: cell (r, c) of the block
+    is bit 4 * r + c of the index and cell (r, c) of the center is bit 2 * r + c
+    of the value
+    """
+    index = np.arange(1 << 16, dtype=np.uint32)
+    cells = [[(index >> (4 * r + c)) & 1 for c in range(4)] for r in range(4)]
+
+    table = np.zeros(1 << 16, dtype=np.uint8)
+    for r in (1, 2):
+        for c in (1, 2):
+            neighbors = sum(
+                cells[r + dr][c + dc]
+                for dr in (-1, 0, 1)
+                for dc in (-1, 0, 1)
+                if dr != 0 or dc != 0
+            )
+            alive = (neighbors == 3) | ((cells[r][c] == 1) & (neighbors == 2))
+            table |= alive.astype(np.uint8) << (2 * (r - 1) + (c - 1))
+    return table
+
+
+# Lookup table used by evolve_lut, computed once at import
+BLOCK_TABLE = _block_table()
+
+
+def evolve_lut(padded: np.ndarray, new_state: np.ndarray, scratch: np.ndarray):
+    """
+    Same as evolve_numpy, but the cells are updated by 2x2 blocks: the 16 cells
+    around each block are packed in an index of BLOCK_TABLE, so each block
+    is a single lookup.
+    """
+    rows, cols = new_state.shape
+
+    # the blocks need an even number of rows and columns
+    if rows % 2 or cols % 2:
+        padded = np.pad(padded, ((0, rows % 2), (0, cols % 2)))
+    block_rows, block_cols = (rows + 1) // 2, (cols + 1) // 2
+
+    index = np.zeros((block_rows, block_cols), dtype=np.uint16)
+    for r in range(4):
+        for c in range(4):
+            cells = padded[r : r + 2 * block_rows : 2, c : c + 2 * block_cols : 2]
+            index |= cells.astype(np.uint16) << np.uint16(4 * r + c)
+
+    blocks = BLOCK_TABLE[index]
+    for r in range(2):
+        for c in range(2):
+            cells = new_state[r::2, c::2]
+            height, width = cells.shape
+            cells[...] = (blocks[:height, :width] >> (2 * r + c)) & 1
+
+
+_executor = None
+
+
+def evolve_threads(padded: np.ndarray, new_state: np.ndarray, scratch: np.ndarray):
+    """
+    Same as evolve_numpy, but the rows are split in stripes of STRIPE_ROWS
+    evolved by a pool of threads. The stripes read 1 row of halo from padded
+    and write disjoint rows of new_state, and the NumPy ufuncs release the GIL,
+    so the stripes run concurrently.
+    """
+    global _executor
+    rows = new_state.shape[0]
+    if rows <= STRIPE_ROWS:
+        evolve_numpy(padded, new_state, scratch)
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+    futures = [
+        _executor.submit(
+            evolve_numpy,
+            padded[top : bottom + 2],
+            new_state[top:bottom],
+            scratch[top:bottom],
+        )
+        for top, bottom in (
+            (top, min(top + STRIPE_ROWS, rows)) for top in range(0, rows, STRIPE_ROWS)
+        )
+    ]
+    for future in futures:
+        future.result()
+
+
+# Each block loads its tile of cells and the border of 1 cell around it in shared
+# memory, so every cell is read once from global memory instead of 9 times. Both
+# grids have a border of 1 DEAD cell, only the inner cells are written.
+_LIFE_SOURCE = r"""
+#define BLOCK %(block)d
+
+extern "C" __global__
+void life(
+    const unsigned char* cells,
+    unsigned char* new_cells,
+    const int rows,
+    const int cols
+) {
+    __shared__ unsigned char tile[BLOCK + 2][BLOCK + 2];
+
+    const int i = blockIdx.y * BLOCK + threadIdx.y;
+    const int j = blockIdx.x * BLOCK + threadIdx.x;
+    const int width = cols + 2;
+
+    // the threads of the block share out the tile and its border
+    for (int r = threadIdx.y; r < BLOCK + 2; r += BLOCK) {
+        for (int c = threadIdx.x; c < BLOCK + 2; c += BLOCK) {
+            const int pi = blockIdx.y * BLOCK + r;
+            const int pj = blockIdx.x * BLOCK + c;
+            tile[r][c] = (pi < rows + 2 && pj < width) ? cells[pi * width + pj] : 0;
+        }
+    }
+    __syncthreads();
+
+    if (i >= rows || j >= cols) {
+        return;
+    }
+    const int r = threadIdx.y + 1;
+    const int c = threadIdx.x + 1;
+    const int neighbors =
+        tile[r - 1][c - 1] + tile[r - 1][c] + tile[r - 1][c + 1]
+        + tile[r][c - 1] + tile[r][c + 1]
+        + tile[r + 1][c - 1] + tile[r + 1][c] + tile[r + 1][c + 1];
+    new_cells[(i + 1) * width + j + 1] = (neighbors | tile[r][c]) == 3;
+}
+""" % {"block": CUDA_BLOCK}
+
+_life_kernel = None
+
+
+class CupyGrid:
+    """
+    Cells kept on the GPU with CuPy between generations, one byte per cell. Every
+    generation is a launch of the life kernel, the cells are only copied back
+    to the host when the state is read.
+    """
+
+    def __init__(self, state: np.ndarray, margin: int):
+        import cupy as cp
+
+        global _life_kernel
+        if _life_kernel is None:
+            _life_kernel = cp.RawKernel(_LIFE_SOURCE, "life")
+
+        self.cells = cp.asarray(np.pad(state, margin))
+        # the next generation is written in the second buffer, its border stays DEAD
+        self.back = cp.zeros_like(self.cells)
+
+    def evolve(self):
+        rows, cols = self.cells.shape[0] - 2, self.cells.shape[1] - 2
+        _life_kernel(
+            (-(-cols // CUDA_BLOCK), -(-rows // CUDA_BLOCK)),
+            (CUDA_BLOCK, CUDA_BLOCK),
+            (self.cells, self.back, np.int32(rows), np.int32(cols)),
+        )
+        self.cells, self.back = self.back, self.cells
+
+    def population(self) -> int:
+        import cupy as cp
+
+        return int(cp.count_nonzero(self.cells))
+
+    def to_array(self) -> np.ndarray:
+        return self.cells.get()
+
+
+def cupy_grid(state: np.ndarray, margin: int):
+    """
+    Grid of the cupy kernel, a CupyGrid when there is a CUDA device. Without it,
+    or for states smaller than CUPY_MIN_CELLS, the cells are kept in a
+    PackedGrid on the CPU.
+    """
+    if state.size < CUPY_MIN_CELLS or not gpu_available():
+        return PackedGrid(state, margin)
+    return CupyGrid(state, margin)
+
+
+# Functions available to compute the next generation
+KERNELS = {
+    "numpy": evolve_numpy,
+    "lut": evolve_lut,
+    "threads": evolve_threads,
+}
+
+# Kernels that keep the cells in their own grid between generations, the
+# state is None meanwhile and it is rebuilt from the grid by sync_state
+GRIDS = {
+    "bitpacked": PackedGrid,
+    "cupy": cupy_grid,
+}
+
+if njit is not None:
+
+    @njit(parallel=True, nogil=True, cache=True, boundscheck=False)
+    def _step_numba(padded: np.ndarray, new_state: np.ndarray):
+        """
+        Fused kernel: the input is read once and each cell is written once,
+        without temporary arrays, and the rows are shared among the cores.
+        The GIL is released, so other Python threads run meanwhile.
+        """
+        rows, cols = new_state.shape
+        for i in prange(rows):
+            for j in range(cols):
+                neighbors = (
+                    padded[i, j] + padded[i, j + 1] + padded[i, j + 2]
+                    + padded[i + 1, j] + padded[i + 1, j + 2]
+                    + padded[i + 2, j] + padded[i + 2, j + 1] + padded[i + 2, j + 2]
+                )
+                new_state[i, j] = (neighbors | padded[i + 1, j + 1]) == 3
+
+    def evolve_numba(padded: np.ndarray, new_state: np.ndarray, scratch: np.ndarray):
+        """
+        Same as evolve_numpy compiled by Numba, scratch is not needed
+        """
+        _step_numba(padded, new_state)
+
+    KERNELS["numba"] = evolve_numba
 
-matplotlib.use("TkAgg")
 
-@typechecked
 @dataclass
 class GameOfLife:
     """
@@ -44,7 +420,8 @@ class GameOfLife:
     The class uses NumPy for efficient array manipulation and type checking.
     """
 
-    # The state of the Game of Life (2D grid)
+    # The state of the Game of Life (2D grid), None while the cells are kept in
+    # the grid of a kernel of GRIDS
     state: np.ndarray
 
     # Current generation number
@@ -59,6 +436,27 @@ class GameOfLife:
     # Character used to represent a live cell
     live_cell_char: str = "࿕"
 
+    # Function used to compute the next generation, one of KERNELS or GRIDS
+    kernel: str = "numpy"
+
+    # Two buffers reused across generations, the state is a view of the front one
+    _front: np.ndarray = field(default=None, init=False, repr=False, compare=False)
+    _back: np.ndarray = field(default=None, init=False, repr=False, compare=False)
+
+    # Buffer for the partial sums of the neighbors
+    _neighbors: np.ndarray = field(default=None, init=False, repr=False, compare=False)
+
+    # Position of the state inside the buffers
+    _row: int = field(default=0, init=False, repr=False, compare=False)
+    _col: int = field(default=0, init=False, repr=False, compare=False)
+
+    # View of the front buffer at _row, _col, any other state was set from outside
+    _view: np.ndarray = field(default=None, init=False, repr=False, compare=False)
+
+    # Grid of the kernel of GRIDS and the generations evolved since it was built
+    _grid: object = field(default=None, init=False, repr=False, compare=False)
+    _grid_generations: int = field(default=0, init=False, repr=False, compare=False)
+
     # Class-level constants to represent cell states
     ALIVE: ClassVar[int] = 1
     DEAD: ClassVar[int] = 0
@@ -73,128 +471,214 @@ class GameOfLife:
         if self.state.ndim != 2:
             raise TypeError("Game of Life state must be a 2D array")
 
-        # State must contain only 0 (DEAD) or 1 (ALIVE)
-        if not np.all(np.isin(self.state, [self.ALIVE, self.DEAD])):
-            raise TypeError("Game of Life state must contain only cells 0 and 1")
+        # State must contain only 0 (DEAD) or 1 (ALIVE), a boolean state always does.
+        # This scans the whole grid, so it is skipped when running with python -O
+        if __debug__ and self.state.dtype != np.bool_:
+            if not ((self.state == self.DEAD) | (self.state == self.ALIVE)).all():
+                raise TypeError("Game of Life state must contain only cells 0 and 1")
 
         # max_generations must be a positive integer
         if self.max_generations <= 0:
             raise TypeError("max_generations must be greater than 0")
 
+        # kernel must be one of the available functions
+        if self.kernel not in KERNELS and self.kernel not in GRIDS:
+            raise ValueError(f"kernel must be one of {', '.join([*KERNELS, *GRIDS])}")
+
+        # One byte per cell is enough to store 0 (DEAD) or 1 (ALIVE)
+        self.allocate(self.state.astype(np.uint8, copy=False))
+
     @classmethod
     @typechecked
     def from_list(cls, initial_state: List[List[int]]) -> "GameOfLife":
-        return cls(state=np.array(initial_state))
+        state = np.asarray(initial_state)
+        # The cells are checked before the uint8 conversion, where -1 or 256 would
+        # overflow, and also when running with python -O
+        if not ((state == cls.DEAD) | (state == cls.ALIVE)).all():
+            raise TypeError("Game of Life state must contain only cells 0 and 1")
+        return cls(state=state.astype(np.uint8, copy=False))
 
     # Returns the number of currently alive cells.
-    def population(self) -> np.int64:
-        # Sum the ALIVE cells
-        return np.sum(self.state)
+    def population(self) -> int:
+        # The grid of the kernel counts its own cells, the state is not rebuilt
+        if self.state is None:
+            return self._grid.population()
+        # Count the ALIVE cells, count_nonzero is a SIMD byte scan without a sum
+        return np.count_nonzero(self.state)
 
     # Prints the current grid state using live/dead cell characters.
     def print_state(self):
-        for row in self.state:
-            print(
-                "".join(
-                    self.live_cell_char if cell == self.ALIVE else self.dead_cell_char
-                    for cell in row
-                )
-            )
+        print(self)
 
-    # Adds a 1-cell border of DEAD cells around the current state to allow growth.
-    def expand(self):
+    # Returns the rows of the grid rendered with the live/dead cell characters.
+    def render_rows(self) -> List[str]:
         """
-        Expands the grid by adding a 1-cell border of DEAD cells around the current state.
-        :return:
+        The characters are picked for every cell at once indexing an array with the
+        state, and each row of characters is read back as a single string.
         """
-        new_state = np.zeros(
-            (self.state.shape[0] + 2, self.state.shape[1] + 2), dtype=int
-        )
-        new_state[1:-1, 1:-1] = self.state
-        self.state = new_state
+        self.sync_state()
+        chars = np.array([self.dead_cell_char, self.live_cell_char])[self.state]
+        if len(self.dead_cell_char) == 1 and len(self.live_cell_char) == 1:
+            # one character per cell, the rows are contiguous strings of UCS4 chars
+            return chars.view(f"<U{chars.shape[1]}").ravel().tolist()
+        return ["".join(row) for row in chars.tolist()]
+
+    # Places the state in the middle of the buffers, growing them when needed.
+    def allocate(self, state: np.ndarray):
+        """
+        Places the state in the middle of the buffers used by evolve. While the state
+        fits in half of the buffers it is only moved to the middle, otherwise the
+        buffers grow at least to the double, so a pattern that moves or grows
+        allocates memory only a few times.
+        """
+        rows, cols = state.shape
+        height, width = (0, 0) if self._front is None else self._front.shape
+
+        if 2 * rows + 4 > height or 2 * cols + 4 > width:
+            shape = (max(2 * height, 3 * rows + 4), max(2 * width, 3 * cols + 4))
+            front = np.zeros(shape, dtype=np.uint8)
+            back = np.zeros(shape, dtype=np.uint8)
+            self._neighbors = np.zeros(shape, dtype=np.uint8)
+        else:
+            # the back buffer is always empty, the state is copied there
+            front, back = self._back, self._front
+
+        self._row = (front.shape[0] - rows) // 2
+        self._col = (front.shape[1] - cols) // 2
+        front[self._row : self._row + rows, self._col : self._col + cols] = state
+
+        # the old front buffer becomes the back buffer, it must be left empty
+        if back is self._front:
+            # every ALIVE cell of the buffer is in the view, not in a sub-view of it
+            if state is self._view:
+                state.fill(self.DEAD)
+            else:
+                back.fill(self.DEAD)
+
+        self._front, self._back = front, back
+        self.state = front[self._row : self._row + rows, self._col : self._col + cols]
+        self._view = self.state
+
+    # Rebuilds the state from the grid of the kernel when the grid keeps the cells.
+    def sync_state(self):
+        """
+        The kernels of GRIDS evolve the cells in their own grid and leave the state
+        as None. The cells of the grid are copied back to the buffers and trimmed,
+        and the grid is built again from the state in the next generation, so the
+        state can be modified in between.
+        """
+        if self.state is None:
+            self.allocate(self._grid.to_array())
+            self.reduce()
 
     # Trims any completely empty rows or columns from the edges of the grid.
     def reduce(self):
         """
         reduce the matrix by removing border rows and columns that contain only dead cells (zeros).
         """
-        row, col = self.state.shape
-
-        def empty_row(r):
-            return np.all(self.state[r, :] == self.DEAD)
-
-        def empty_col(c):
-            return np.all(self.state[:, c] == self.DEAD)
+        # rows with at least one ALIVE cell
+        row_alive = np.any(self.state, axis=1)
 
-        top = 0
-        while top < row and empty_row(top):
-            top += 1
+        if not row_alive.any():
+            print(f"The simulation is over, the cell population is {self.population()}")
+            self.state = self.state[:1, :1]
+            self._view = self.state
+            return
 
-        bottom = row - 1
-        while bottom >= 0 and empty_row(bottom):
-            bottom -= 1
+        # argmax returns the first True, on the reversed array it finds the last one
+        top = int(np.argmax(row_alive))
+        bottom = len(row_alive) - 1 - int(np.argmax(row_alive[::-1]))
 
-        left = 0
-        right = col - 1
-        while left < col and empty_col(left):
-            left += 1
-        while right >= 0 and empty_col(right):
-            right -= 1
+        # the columns are only scanned between the first and last ALIVE rows
+        col_alive = np.any(self.state[top : bottom + 1], axis=0)
+        left = int(np.argmax(col_alive))
+        right = len(col_alive) - 1 - int(np.argmax(col_alive[::-1]))
 
-        if top > bottom or left > right:
-            print(f"The simulation is over, the cell population is {self.population()}")
-            self.state = np.array([0])
-        else:
-            self.state = self.state[top : bottom + 1, left : right + 1]
-
-    # Returns the number of ALIVE neighbors around a given cell.
-    def count_neighbors(self) -> np.ndarray:
-        """
-        Count the number of alive neighbors for a given cell in the state.
-        """
-        # Define the kernel for counting neighbors
-        # The kernel is a 3x3 matrix with 1s in all positions except the center
-        # The center position is 0 because we don't want to count the cell itself
-        kernel = np.array([
-            [1, 1, 1],
-            [1, 0, 1],
-            [1, 1, 1],
-        ])
-        """
-        convolve2d is a function from scipy that performs a 2D convolution
-        a convolution is a mathematical operation that combines two functions
-        in this case, we are combining the kernel with the state
-        The result is a 2D array where each cell contains the number of alive neighbors
-        """
-        return convolve2d(self.state, kernel, mode="same", boundary="fill", fillvalue=0)
+        self.state = self.state[top : bottom + 1, left : right + 1]
+        # the state is a view of the buffers, keep track of its position
+        self._row += top
+        self._col += left
+        self._view = self.state
 
     # Evolves the game state to the next generation based on the rules of the game.
     def evolve(self):
         """
         Evolve the current state to the next generation.
+        The next state is written in the back buffer and then the buffers are
+        swapped, so the buffers are not allocated again while the pattern fits in them.
+        The kernels of GRIDS evolve their grid instead, see evolve_grid.
         """
-        self.expand()
-        neighbors = self.count_neighbors()
-        new_state = np.zeros_like(self.state)
-        """
-        np.logical_and is a function that returns the logical AND of two arrays
-        and here is used to combine the conditions for the alive and dead cells
-        """
-        new_state[np.logical_and(self.state == self.ALIVE, np.logical_or(neighbors == 2, neighbors == 3))] = self.ALIVE
-        new_state[np.logical_and(self.state == self.DEAD, neighbors == 3)] = self.ALIVE
+        if self.kernel in GRIDS:
+            self.evolve_grid()
+            return
+        self.sync_state()
+
+        # the state was replaced from outside, or the pattern reached the border
+        state = self.state
+        rows, cols = state.shape
+        height, width = self._front.shape
+        if (
+            state is not self._view
+            or self._row < 2
+            or self._col < 2
+            or self._row + rows + 2 > height
+            or self._col + cols + 2 > width
+        ):
+            self.allocate(state)
+
+        # the next state can grow 1 cell around the current one
+        front = self._front
+        top, left = self._row - 1, self._col - 1
+        bottom, right = self._row + rows + 1, self._col + cols + 1
+        current = front[top:bottom, left:right]
+        new_state = self._back[top:bottom, left:right]
+
+        KERNELS[self.kernel](
+            front[top - 1 : bottom + 1, left - 1 : right + 1],
+            new_state,
+            self._neighbors[top:bottom, left - 1 : right + 1],
+        )
 
+        # the front buffer becomes the back buffer, it must be left empty
+        current.fill(self.DEAD)
+        self._front, self._back = self._back, front
+        self._row, self._col = top, left
         self.state = new_state
         self.reduce()
         self.generation += 1
 
+    def evolve_grid(self):
+        """
+        Evolve the grid of the kernel to the next generation without rebuilding
+        the state. The grid is built from the state when the state was read, as it
+        may have been modified, or when the pattern may have reached the margin.
+        """
+        if self.state is None and self._grid_generations >= GRID_MARGIN - 1:
+            self.sync_state()
+        if self.state is not None:
+            self._grid = GRIDS[self.kernel](self.state, GRID_MARGIN)
+            self._grid_generations = 0
+
+        self._grid.evolve()
+        self._grid_generations += 1
+        self.state = None
+        self.generation += 1
+
     @typechecked
     def run_simulation(
         self,
         max_generations: Optional[int] = None,
         show_progress: Optional[bool] = False,
+        plot_every: Optional[int] = None,
+        hashlife: Optional[bool] = False,
     ) -> str:
         """
         Run the simulation for a given number of generations.
+        If plot_every is given, the state is drawn every plot_every generations
+        on a single figure that is reused for the whole simulation.
+        If hashlife is True, the generations are advanced at once with
+        Hashlife instead of the kernel, without progress bar nor plots, and
+        the generation is the last one even if the population died out before.
         """
         if max_generations is None:
             max_generations = self.max_generations
@@ -202,33 +686,82 @@ class GameOfLife:
         if max_generations <= 0:
             raise ValueError("max_generations must be positive")
 
-        for _ in tqdm(
-            range(0, max_generations),
-            desc="Evolving generations",
-            unit="gen",
-            ncols=200,
-            disable=not show_progress,
-        ):
-            # generate the next generation
-            self.evolve()
-            # if the population is 0, break the loop
+        if plot_every is not None and plot_every <= 0:
+            raise ValueError("plot_every must be positive")
+
+        if hashlife:
+            if plot_every is not None:
+                raise ValueError("plot_every is not supported with hashlife")
+            self.run_hashlife(max_generations)
             if self.population() == 0:
                 return "WARN: Stopping simulation at:\n" + str(self)
+            return str(self)
+
+        # the figure and the image are created once, each plot only updates the data
+        fig = image = None
+        if plot_every is not None:
+            fig, ax = plt.subplots(figsize=(10, 10))
+            ax.set_axis_off()
+            image = ax.imshow(
+                self.state,
+                cmap="binary",
+                vmin=self.DEAD,
+                vmax=self.ALIVE,
+                interpolation="nearest",
+            )
+
+        try:
+            for _ in tqdm(
+                range(0, max_generations),
+                desc="Evolving generations",
+                unit="gen",
+                ncols=200,
+                disable=not show_progress,
+            ):
+                # generate the next generation
+                self.evolve()
+
+                if image is not None and self.generation % plot_every == 0:
+                    self.sync_state()
+                    rows, cols = self.state.shape
+                    image.set_data(self.state)
+                    image.set_extent((-0.5, cols - 0.5, rows - 0.5, -0.5))
+                    image.axes.set_title(f"Generation: {self.generation}")
+                    fig.canvas.draw_idle()
+                    plt.pause(0.01)
+
+                # if the population is 0, break the loop
+                if self.population() == 0:
+                    return "WARN: Stopping simulation at:\n" + str(self)
+        finally:
+            if fig is not None:
+                plt.close(fig)
 
         return str(self)
 
+    def run_hashlife(self, generations: int):
+        """
+        Advance the given number of generations at once using the Hashlife
+        quadtree, the state is rebuilt as a trimmed array at the end. The
+        nodes and successors cached by Hashlife are released afterwards.
+        """
+        if generations < 0:
+            raise ValueError("generations must not be negative")
+
+        self.sync_state()
+        try:
+            self.state = to_array(advance(from_array(self.state), generations))
+        finally:
+            clear_cache()
+        self.generation += generations
+
     def __str__(self):
         """Return a string representation of the current state"""
-        return "\n".join(
-            "".join(
-                self.live_cell_char if cell == self.ALIVE else self.dead_cell_char
-                for cell in row
-            )
-        for row in self.state
-        )
+        return "\n".join(self.render_rows())
 
 @typechecked
 def plot_game_of_life(game_of_life: GameOfLife, path: Optional[str] = None) -> None:
+    game_of_life.sync_state()
     fig = plt.figure(facecolor="white", dpi=200)
 
     ax = plt.gca()
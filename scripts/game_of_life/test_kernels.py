@@ -0,0 +1,131 @@
+#  Copyright (c) 2025.  Departamento de Ingenieria de Sistemas y Computacion
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import hashlife
+from runme_numpy import GRIDS, KERNELS, CupyGrid, GameOfLife, GRID_MARGIN
+from libs.gpu import gpu_available
+
+
+def random_state(rows: int, cols: int, seed: int) -> np.ndarray:
+    return (np.random.default_rng(seed).random((rows, cols)) < 0.4).astype(np.uint8)
+
+
+class KernelsTest(unittest.TestCase):
+    """
+    Every kernel is run side by side with evolve_numpy, the states must match
+    generation by generation
+    """
+
+    # Grids evolved by each kernel, one of them above CUPY_MIN_CELLS
+    SHAPES = ((3, 3), (17, 40), (64, 130), (300, 300))
+
+    # More generations than GRID_MARGIN, so the grids are built again
+    GENERATIONS = GRID_MARGIN + 40
+
+    def assert_same_evolution(self, kernel: str, check_every: int):
+        for seed, shape in enumerate(self.SHAPES):
+            expected = GameOfLife(state=random_state(*shape, seed), kernel="numpy")
+            game = GameOfLife(state=random_state(*shape, seed), kernel=kernel)
+            for generation in range(self.GENERATIONS):
+                expected.evolve()
+                game.evolve()
+                self.assertEqual(game.population(), expected.population(), (shape, generation))
+                if generation % check_every == 0 or expected.population() == 0:
+                    game.sync_state()
+                    np.testing.assert_array_equal(game.state, expected.state, str((shape, generation)))
+                if expected.population() == 0:
+                    break
+
+    def test_kernels_match_numpy(self):
+        for kernel in [*KERNELS, *GRIDS]:
+            with self.subTest(kernel=kernel):
+                self.assert_same_evolution(kernel, check_every=1)
+
+    def test_grids_match_numpy_without_reads(self):
+        # the state is only rebuilt every 25 generations, the grid keeps the cells meanwhile
+        for kernel in GRIDS:
+            with self.subTest(kernel=kernel):
+                self.assert_same_evolution(kernel, check_every=25)
+
+    def test_edited_state_is_evolved(self):
+        for kernel in GRIDS:
+            with self.subTest(kernel=kernel):
+                game = GameOfLife(state=random_state(40, 40, 7), kernel=kernel)
+                game.evolve()
+                game.sync_state()
+                game.state[...] = GameOfLife.DEAD
+                self.assertEqual(game.population(), 0)
+                game.evolve()
+                self.assertEqual(game.population(), 0)
+
+    def test_sub_view_of_state_is_evolved(self):
+        # only the last row is kept, it is a view of the buffers but not the state
+        for kernel in [*KERNELS, *GRIDS]:
+            with self.subTest(kernel=kernel):
+                game = GameOfLife.from_list([[1, 1, 1], [0, 0, 0], [1, 1, 1]])
+                game.kernel = kernel
+                game.state = game.state[2:, :]
+                game.evolve()
+                game.sync_state()
+                np.testing.assert_array_equal(game.state, [[1], [1], [1]])
+
+    @unittest.skipUnless(gpu_available(), "CuPy with a CUDA device is not available")
+    def test_cupy_grid_on_device(self):
+        game = GameOfLife(state=random_state(300, 300, 3), kernel="cupy")
+        game.evolve()
+        self.assertIsInstance(game._grid, CupyGrid)
+        self.assert_same_evolution("cupy", check_every=1)
+
+
+def trimmed(state: np.ndarray) -> np.ndarray:
+    rows, cols = np.nonzero(state)
+    return state[rows.min() : rows.max() + 1, cols.min() : cols.max() + 1]
+
+
+class HashlifeTest(unittest.TestCase):
+    """
+    Hashlife must reach the same pattern as the generations of evolve_numpy
+    """
+
+    PATTERNS = {
+        "glider": [[0, 1, 0], [0, 0, 1], [1, 1, 1]],
+        "r-pentomino": [[0, 1, 1], [1, 1, 0], [0, 1, 0]],
+    }
+
+    # Powers of 2 and sums of them, advance takes one successor per bit
+    GENERATIONS = (0, 1, 2, 7, 64, 100)
+
+    def tearDown(self):
+        hashlife.clear_cache()
+
+    def test_advance_matches_numpy(self):
+        for name, pattern in self.PATTERNS.items():
+            for generations in self.GENERATIONS:
+                with self.subTest(pattern=name, generations=generations):
+                    expected = GameOfLife.from_list(pattern)
+                    for _ in range(generations):
+                        expected.evolve()
+                    expected.sync_state()
+                    node = hashlife.from_array(np.array(pattern, dtype=np.uint8))
+                    state = hashlife.to_array(hashlife.advance(node, generations))
+                    np.testing.assert_array_equal(state, trimmed(expected.state))
+
+    def test_run_hashlife(self):
+        game = GameOfLife.from_list(self.PATTERNS["r-pentomino"])
+        expected = GameOfLife.from_list(self.PATTERNS["r-pentomino"])
+        for _ in range(100):
+            expected.evolve()
+        expected.sync_state()
+        game.run_hashlife(100)
+        self.assertEqual(game.generation, 100)
+        np.testing.assert_array_equal(game.state, trimmed(expected.state))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,12 @@
 #  Copyright (c) 2025.  Departamento de Ingenieria de Sistemas y Computacion
+import hashlib
 import logging
+import shutil
+from pathlib import Path
 
 import pandas as pd
 from matplotlib import pyplot as plt
 from pandas.plotting import scatter_matrix
-from ydata_profiling import ProfileReport
 
 from benchmark import benchmark
 from logger import configure_logging
@@ -27,12 +29,23 @@ def main():
         log.debug(f"Data readed: \n{df}")
 
     log.debug(f"Describe: \n {df.describe()}")
-    log.debug(f"Correlation: \n {df.corr}")
+    log.debug(f"Correlation: \n {df.corr(numeric_only=True)}")
     #scatter_matrix(df[df["variety"] == "Iris-setosa"], label="Iris-setosa")
     #plt.show()
 
-    profile = ProfileReport(df, title="Profiling Report", explorative=True)
-    profile.to_file("../output/iris_report.html")
+    # the report is generated once for each content of the CSV
+    key = hashlib.md5(Path("../data/iris.csv").read_bytes()).hexdigest()
+    cached_report = Path(f"../output/iris_report_{key}.html")
+    if cached_report.exists():
+        log.debug(f"Report of {key} already generated")
+    else:
+        with benchmark(operation_name="profile iris", log=log):
+            # ydata_profiling takes seconds to import, only when it is needed
+            from ydata_profiling import ProfileReport
+
+            profile = ProfileReport(df, title="Profiling Report", explorative=True)
+            profile.to_file(cached_report)
+    shutil.copy(cached_report, "../output/iris_report.html")
 
     # Finish the program
     log.debug("Done")
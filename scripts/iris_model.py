@@ -1,6 +1,9 @@
 #  Copyright (c) 2025.  Departamento de Ingenieria de Sistemas y Computacion
 import logging
 import pickle
+import shutil
+import subprocess
+from pathlib import Path
 
 import pandas as pd
 
@@ -13,6 +16,19 @@ from typeguard import typechecked
 
 from benchmark import benchmark
 from logger import configure_logging
+from native import LIBRARY_SUFFIX, TOOLCHAIN
+
+# treelite and tl2cgen are optional, without them the forest is only pickled
+try:
+    import tl2cgen
+    import treelite.sklearn
+except ImportError:
+    treelite = None
+
+# Forest compiled by main and loaded by run_iris_model.py
+LIBRARY_PATH = (
+    Path(__file__).resolve().parent.parent / "output" / f"iris_randomforest{LIBRARY_SUFFIX}"
+)
 
 @typechecked
 def visualize_tree(model: RandomForestClassifier, x, y):
@@ -65,6 +81,26 @@ def main():
     with open("../output/iris_randomforest.pkl", "wb") as f:
         pickle.dump(model, f)
 
+    # the forest is also compiled to C, so the web service scores it natively.
+    # A library of a previous model is removed, so it is never used by mistake
+    LIBRARY_PATH.unlink(missing_ok=True)
+    # tl2cgen reports a missing gcc as a ValueError, so it is looked up before
+    if treelite is not None and TOOLCHAIN != "msvc" and shutil.which(TOOLCHAIN) is None:
+        log.warning(f"The forest is not compiled, {TOOLCHAIN} is not installed")
+    elif treelite is not None:
+        try:
+            with benchmark("Compiling Random Forest model", log):
+                tl2cgen.export_lib(
+                    treelite.sklearn.import_model(model),
+                    toolchain=TOOLCHAIN,
+                    libpath=str(LIBRARY_PATH),
+                    params={"parallel_comp": 4},
+                )
+        except (tl2cgen.TL2cgenError, subprocess.CalledProcessError, OSError) as error:
+            # without the library the web service uses the pickled model
+            LIBRARY_PATH.unlink(missing_ok=True)
+            log.warning(f"The forest could not be compiled with {TOOLCHAIN}: {error}")
+
     log.info("Done...")
 
 if __name__ == "__main__":
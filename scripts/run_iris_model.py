@@ -1,13 +1,16 @@
 #  Copyright (c) 2025.  Departamento de Ingenieria de Sistemas y Computacion
+import io
 import logging
 import pickle
+import warnings
 
 import sys
 import os
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
-from matplotlib import pyplot as plt
+from matplotlib.figure import Figure
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'libs')))
 
@@ -15,13 +18,85 @@ import streamlit
 from sklearn.ensemble import RandomForestClassifier
 
 from logger import configure_logging
+from native import LIBRARY_SUFFIX
+
+# tl2cgen is optional, without it the pickled model classifies the flowers
+try:
+    import tl2cgen
+except ImportError:
+    tl2cgen = None
+
+OUTPUT_PATH = Path(__file__).resolve().parent.parent / "output"
+
+# Forest compiled by iris_model.py
+LIBRARY_PATH = OUTPUT_PATH / f"iris_randomforest{LIBRARY_SUFFIX}"
 
 @streamlit.cache_data
 def load_iris_model() -> RandomForestClassifier:
-    model_path = Path(__file__).resolve().parent.parent / "output" / "iris_randomforest.pkl"
+    model_path = OUTPUT_PATH / "iris_randomforest.pkl"
     with model_path.open("rb") as model_file:
         return pickle.load(model_file)
 
+
+@streamlit.cache_resource
+def load_iris_predictor():
+    """
+    Forest compiled to a shared library by iris_model.py, None when it was not
+    compiled or tl2cgen is not available
+    """
+    if tl2cgen is None or not LIBRARY_PATH.exists():
+        return None
+    return tl2cgen.Predictor(str(LIBRARY_PATH))
+
+@streamlit.cache_data(max_entries=1024)
+def classify(
+    sepal_length: float, sepal_width: float, petal_length: float, petal_width: float
+) -> tuple:
+    """
+    Predicted variety and probabilities of the features, cached by the values
+    of the sliders so a repeated combination does not call the model again
+    """
+    model = load_iris_model()
+    features = np.array(
+        [[sepal_length, sepal_width, petal_length, petal_width]], dtype=np.float32
+    )
+
+    # the compiled forest returns the probabilities in the order of model.classes_
+    predictor = load_iris_predictor()
+    if predictor is not None:
+        probabilities = predictor.predict(tl2cgen.DMatrix(features)).reshape(-1)
+        return model.classes_[np.argmax(probabilities)], probabilities
+
+    # the model was trained with a DataFrame, the column names are not needed
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        return model.predict(features)[0], model.predict_proba(features)[0]
+
+
+@streamlit.cache_data(max_entries=1024)
+def probabilities_png(classes: tuple, probabilities: tuple) -> bytes:
+    """
+    Bar chart of the predicted probabilities as PNG bytes, drawn once for each
+    combination of probabilities. Every call builds its own figure without
+    pyplot, only the bytes are cached and shared by the sessions.
+    """
+    probabilities_df = pd.DataFrame(
+        probabilities,
+        index=classes,
+        columns=["Probability"]
+    )
+
+    figure = Figure(figsize=(8, 4))
+    axes = figure.subplots()
+    axes.set_title("Predicted probabilities for iris flower varieties")
+    probabilities_df.plot(kind="bar", legend=False, ax=axes)
+    figure.tight_layout()
+
+    png = io.BytesIO()
+    figure.savefig(png, format="png")
+    return png.getvalue()
+
+
 def main():
     log = logging.getLogger(__name__)
     log.info("Starting web service for Iris model...")
@@ -80,31 +155,16 @@ def main():
         )
         log.debug(f"Petal Width (cm): {petal_width} cm")
 
-    features= pd.DataFrame(
-        [[sepal_length, sepal_width, petal_length, petal_width]],
-        columns=["sepal.length", "sepal.width", "petal.length", "petal.width"],
+    predict, probabilities = classify(
+        sepal_length, sepal_width, petal_length, petal_width
     )
-
-    predict = model.predict(features)[0]
     streamlit.write(f"The predicted variety is: **{predict}**")
 
-    # predict probabilities
-    probabilities = model.predict_proba(features)[0]
-
-    probabilities_df = pd.DataFrame(
-        probabilities,
-        index=model.classes_,
-        columns=["Probability"]
+    # draw the probabilities, rounded so close results share the figure
+    png = probabilities_png(
+        tuple(model.classes_), tuple(np.round(probabilities, 3).tolist())
     )
-
-    # draw the probabilities
-    plt.figure(figsize=(8, 4))
-
-    plt.title("Predicted probabilities for iris flower varieties")
-    probabilities_df.plot(kind="bar", legend=False, ax=plt.gca())
-    plt.tight_layout()
-
-    streamlit.pyplot(plt)
+    streamlit.image(png)
 
     log.info("Done..")
 
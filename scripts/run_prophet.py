@@ -22,12 +22,18 @@ def main():
     log.debug(f"DataFrame shape: {df.shape}")
     log.debug(f"Data: \n{df.head()}")
 
-    # the model
+    # the model, only the yearly seasonality and without the uncertainty
+    # intervals, which are sampled on every predict
     model = Prophet(
         changepoints=["2011-01-01", "2013-01-01"],
+        daily_seasonality=False,
+        weekly_seasonality=False,
+        uncertainty_samples=0,
+        mcmc_samples=0,
+        stan_backend="CMDSTANPY",
     )
     with benchmark("Fitting Prophet model", log):
-        model.fit(df)
+        model.fit(df, algorithm="LBFGS")
 
     # Create the future dataframe
     future = model.make_future_dataframe(periods=365)